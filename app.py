@@ -12,29 +12,77 @@ Autor: Projekt edukacyjny
 Data: 2024
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, send_from_directory
+from flask.json.provider import JSONProvider
+from flask_compress import Compress
+from werkzeug.utils import secure_filename
+import orjson
+import json
 import os
-from datetime import datetime, timedelta
+import secrets
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from work_monitor import WorkMonitor
 from posture_analyzer import PostureAnalyzer
 from exercises import ExerciseManager
 
+# Dozwolone rozszerzenia przesyłanych obrazów - stały frozenset na poziomie
+# modułu, aby nie budować zbioru przy każdym wywołaniu allowed_file
+_ALLOWED_EXTENSIONS = frozenset(('png', 'jpg', 'jpeg', 'gif'))
+
+class OrjsonProvider(JSONProvider):
+    """
+    Provider JSON dla Flaska oparty o orjson.
+
+    Serializacja odpowiedzi jsonify odbywa się w kodzie C zamiast
+    w czysto pythonowym enkoderze biblioteki standardowej, co skraca
+    czas obsługi żądań na odpytywanych co sekundę endpointach API.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 # Inicjalizacja aplikacji Flask
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # Maksymalny rozmiar pliku: 16MB
 app.config['SECRET_KEY'] = 'your-secret-key-here'  # W produkcji użyj zmiennej środowiskowej
+app.config['ANALYSIS_FOLDER'] = 'analysis_results'
+# Włącz przy uruchomieniu za nginx - przesłane zdjęcia odda wtedy nginx
+# przez sendfile, zamiast zajmować proces aplikacji na czas transferu
+app.config['USE_X_ACCEL_REDIRECT'] = os.environ.get('USE_X_ACCEL_REDIRECT') == '1'
+
+# Kompresja odpowiedzi, ale tylko powyżej 1 KB - dla drobnych odpowiedzi
+# odpytywanych co sekundę (timer, czas pracy) narzut kompresji i nagłówków
+# przewyższyłby zaoszczędzone bajty. Zyskuje głównie katalog ćwiczeń
+app.config['COMPRESS_MIN_SIZE'] = 1024
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+Compress(app)
 
 # Utworzenie folderu na przesłane zdjęcia, jeśli nie istnieje
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+# Folder na wyniki analizy postawy wykonywanej w tle
+os.makedirs(app.config['ANALYSIS_FOLDER'], exist_ok=True)
+
+# Pula wątków do analizy postawy w tle - przesłanie zdjęcia zwraca od razu
+# identyfikator zadania (202), a worker HTTP nie czeka na pipeline OpenCV.
+# Wyniki lądują w plikach JSON, więc przy kilku procesach gunicorna wynik
+# może odebrać inny proces niż ten, który przyjął zdjęcie
+_analysis_executor = ThreadPoolExecutor(max_workers=2)
+
 # Inicjalizacja modułów
 work_monitor = WorkMonitor()
 posture_analyzer = PostureAnalyzer()
 exercise_manager = ExerciseManager()
 
 
-@app.route('/')
 def index():
     """
     Główna strona aplikacji.
@@ -45,7 +93,6 @@ def index():
     return render_template('index.html')
 
 
-@app.route('/api/work-time', methods=['GET'])
 def get_work_time():
     """
     Endpoint API zwracający aktualny czas pracy.
@@ -64,7 +111,6 @@ def get_work_time():
     })
 
 
-@app.route('/api/start-work', methods=['POST'])
 def start_work():
     """
     Endpoint do rozpoczęcia sesji pracy.
@@ -76,7 +122,6 @@ def start_work():
     return jsonify({'status': 'success', 'message': 'Sesja pracy rozpoczęta'})
 
 
-@app.route('/api/stop-work', methods=['POST'])
 def stop_work():
     """
     Endpoint do zakończenia sesji pracy.
@@ -88,7 +133,6 @@ def stop_work():
     return jsonify({'status': 'success', 'message': 'Sesja pracy zakończona'})
 
 
-@app.route('/api/break-taken', methods=['POST'])
 def break_taken():
     """
     Endpoint do oznaczenia przerwy jako wykonanej.
@@ -100,19 +144,19 @@ def break_taken():
     return jsonify({'status': 'success', 'message': 'Przerwa zarejestrowana'})
 
 
-@app.route('/api/exercises', methods=['GET'])
 def get_exercises():
     """
     Endpoint zwracający listę dostępnych ćwiczeń.
     
     Returns:
-        jsonify: Lista ćwiczeń w formacie JSON
+        Response: Lista ćwiczeń w formacie JSON (zserializowana raz przy starcie)
     """
-    exercises = exercise_manager.get_exercises()
-    return jsonify({'exercises': exercises})
+    body, etag = exercise_manager.get_exercises_json()
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
 
 
-@app.route('/api/exercise/<int:exercise_id>', methods=['GET'])
 def get_exercise(exercise_id):
     """
     Endpoint zwracający szczegóły konkretnego ćwiczenia.
@@ -129,53 +173,104 @@ def get_exercise(exercise_id):
     return jsonify({'error': 'Ćwiczenie nie znalezione'}), 404
 
 
-@app.route('/api/posture/upload', methods=['POST'])
 def upload_posture_image():
     """
     Endpoint do przesyłania zdjęcia stanowiska pracy do analizy postawy.
-    
+    Analiza wykonywana jest w tle - odpowiedź 202 zawiera identyfikator
+    zadania, a wynik odbiera się endpointem /api/posture/result/<job_id>.
+
     Returns:
-        jsonify: Wyniki analizy postawy z sugestiami
+        jsonify: Identyfikator zadania analizy (202) lub błąd
     """
     if 'image' not in request.files:
         return jsonify({'error': 'Brak pliku obrazu'}), 400
-    
+
     file = request.files['image']
-    
+
     if file.filename == '':
         return jsonify({'error': 'Nie wybrano pliku'}), 400
-    
+
     if file and allowed_file(file.filename):
-        # Zapisanie pliku
-        filename = f"posture_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
+        # Zapisanie pliku - nazwa z licznika nanosekund i losowego sufiksu,
+        # aby dwa przesłania w tej samej sekundzie nie nadpisywały się wzajemnie
+        filename = f"posture_{time.time_ns()}_{secrets.token_hex(4)}.jpg"
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        # Analiza postawy
-        analysis = posture_analyzer.analyze_posture(filepath)
-        
+        save_upload(file, filepath)
+
+        # Zlecenie analizy postawy w tle
+        job_id = secrets.token_hex(8)
+        write_analysis_result(job_id, {'status': 'pending'})
+        _analysis_executor.submit(run_analysis_job, job_id, filepath)
+
         return jsonify({
-            'status': 'success',
+            'status': 'accepted',
             'filename': filename,
-            'analysis': analysis
-        })
-    
+            'job_id': job_id
+        }), 202
+
     return jsonify({'error': 'Nieprawidłowy format pliku'}), 400
 
 
-@app.route('/api/posture/suggestions', methods=['GET'])
+def get_posture_result(job_id):
+    """
+    Endpoint zwracający wynik zleconej analizy postawy.
+
+    Args:
+        job_id: Identyfikator zadania zwrócony przez /api/posture/upload
+
+    Returns:
+        jsonify: Wynik analizy, status 'pending' lub błąd 404
+    """
+    result_path = analysis_result_path(job_id)
+    try:
+        with open(result_path, 'r') as f:
+            return jsonify(json.load(f))
+    except FileNotFoundError:
+        return jsonify({'error': 'Nie znaleziono zadania'}), 404
+
+
+def uploaded_image(name):
+    """
+    Endpoint zwracający przesłane zdjęcie stanowiska pracy.
+
+    Za nginx (USE_X_ACCEL_REDIRECT=1) odpowiedź zawiera tylko nagłówek
+    X-Accel-Redirect, a sam plik streamuje nginx przez sendfile:
+
+        location /internal/uploads/ {
+            internal;
+            alias /sciezka/do/static/uploads/;
+            sendfile on;
+        }
+
+    Bez nginx plik oddawany jest przez send_from_directory.
+
+    Args:
+        name: Nazwa pliku w folderze uploads
+
+    Returns:
+        Response: Zawartość zdjęcia lub przekierowanie wewnętrzne dla nginx
+    """
+    name = secure_filename(name)
+    if app.config['USE_X_ACCEL_REDIRECT']:
+        response = Response(mimetype='image/jpeg')
+        response.headers['X-Accel-Redirect'] = f"/internal/uploads/{name}"
+        return response
+    return send_from_directory(app.config['UPLOAD_FOLDER'], name)
+
+
 def get_posture_suggestions():
     """
     Endpoint zwracający ogólne sugestie dotyczące ergonomii stanowiska pracy.
     
     Returns:
-        jsonify: Lista sugestii ergonomicznych
+        Response: Lista sugestii ergonomicznych (zserializowana raz przy starcie)
     """
-    suggestions = posture_analyzer.get_ergonomic_suggestions()
-    return jsonify({'suggestions': suggestions})
+    body, etag = posture_analyzer.get_ergonomic_suggestions_json()
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
 
 
-@app.route('/api/stats', methods=['GET'])
 def get_stats():
     """
     Endpoint zwracający statystyki pracy.
@@ -187,25 +282,50 @@ def get_stats():
     return jsonify(stats)
 
 
-@app.route('/api/timer', methods=['GET'])
+def get_state():
+    """
+    Endpoint zwracający łączny stan aplikacji w jednej odpowiedzi.
+
+    Łączy dane z /api/work-time, /api/timer i /api/stats, dzięki czemu
+    klient odpytuje jeden endpoint zamiast trzech. Wspólny znacznik czasu
+    sprawia, że wszystkie pola odnoszą się do tej samej chwili.
+
+    Returns:
+        jsonify: Stan pracy, timera i statystyki dzienne
+    """
+    now = time.monotonic()
+    work_time = work_monitor.get_current_work_time(now)
+    break_suggested = work_monitor.should_take_break(now)
+    remaining = work_monitor.get_timer_remaining(now)
+
+    return jsonify({
+        'work': {
+            'work_time_seconds': work_time,
+            'work_time_formatted': format_time(work_time),
+            'break_suggested': break_suggested,
+            'break_message': 'Czas na przerwę!' if break_suggested else None
+        },
+        'timer': {
+            'remaining_seconds': remaining,
+            'remaining_formatted': work_monitor.format_timer_time(remaining),
+            'running': work_monitor.timer_running,
+            'paused': work_monitor.timer_paused,
+            'timer_type': work_monitor.timer_type  # 'pomodoro' lub 'break'
+        },
+        'stats': work_monitor.get_daily_stats(now)
+    })
+
+
 def get_timer():
     """
     Endpoint zwracający stan timera Pomodoro.
     
     Returns:
-        jsonify: Stan timera
+        Response: Stan timera w formacie JSON (z cache w WorkMonitor)
     """
-    remaining = work_monitor.get_timer_remaining()
-    return jsonify({
-        'remaining_seconds': remaining,
-        'remaining_formatted': work_monitor.format_timer_time(remaining),
-        'running': work_monitor.timer_running,
-        'paused': work_monitor.timer_paused,
-        'timer_type': work_monitor.timer_type  # 'pomodoro' lub 'break'
-    })
+    return Response(work_monitor.snapshot_timer(), mimetype='application/json')
 
 
-@app.route('/api/timer/pomodoro', methods=['POST'])
 def start_pomodoro():
     """
     Endpoint do rozpoczęcia timera Pomodoro.
@@ -217,7 +337,6 @@ def start_pomodoro():
     return jsonify({'status': 'success', 'message': 'Timer Pomodoro rozpoczęty'})
 
 
-@app.route('/api/timer/break', methods=['POST'])
 def start_break():
     """
     Endpoint do rozpoczęcia timera przerwy.
@@ -229,7 +348,6 @@ def start_break():
     return jsonify({'status': 'success', 'message': 'Timer przerwy rozpoczęty'})
 
 
-@app.route('/api/timer/pause', methods=['POST'])
 def pause_timer():
     """
     Endpoint do pauzowania timera.
@@ -241,7 +359,6 @@ def pause_timer():
     return jsonify({'status': 'success', 'message': 'Timer zatrzymany'})
 
 
-@app.route('/api/timer/resume', methods=['POST'])
 def resume_timer():
     """
     Endpoint do wznowienia timera.
@@ -253,7 +370,6 @@ def resume_timer():
     return jsonify({'status': 'success', 'message': 'Timer wznowiony'})
 
 
-@app.route('/api/timer/stop', methods=['POST'])
 def stop_timer():
     """
     Endpoint do zatrzymania timera.
@@ -265,6 +381,93 @@ def stop_timer():
     return jsonify({'status': 'success', 'message': 'Timer zatrzymany'})
 
 
+def analysis_result_path(job_id):
+    """
+    Buduje ścieżkę pliku z wynikiem analizy dla danego zadania.
+
+    Args:
+        job_id: Identyfikator zadania (hex z secrets.token_hex)
+
+    Returns:
+        str: Ścieżka do pliku JSON z wynikiem
+    """
+    # job_id pochodzi z token_hex, ale filtrujemy na wszelki wypadek,
+    # aby identyfikator z adresu URL nie mógł wskazać innej ścieżki
+    safe_id = ''.join(c for c in job_id if c.isalnum())
+    return os.path.join(app.config['ANALYSIS_FOLDER'], f"{safe_id}.json")
+
+
+def write_analysis_result(job_id, payload):
+    """
+    Zapisuje atomowo wynik (lub status) zadania analizy do pliku JSON.
+
+    Args:
+        job_id: Identyfikator zadania
+        payload: Słownik z wynikiem lub statusem
+    """
+    result_path = analysis_result_path(job_id)
+    tmp_path = result_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp_path, result_path)
+
+
+def run_analysis_job(job_id, filepath):
+    """
+    Wykonuje analizę postawy w tle i zapisuje wynik do pliku.
+
+    Args:
+        job_id: Identyfikator zadania
+        filepath: Ścieżka do przesłanego zdjęcia
+    """
+    analysis = posture_analyzer.analyze_posture(filepath)
+    write_analysis_result(job_id, {'status': 'done', 'analysis': analysis})
+
+
+def save_upload(file, filepath):
+    """
+    Zapisuje przesłany plik na dysk możliwie najtańszą ścieżką.
+
+    Małe przesłania Werkzeug trzyma w pamięci (BytesIO) - wtedy zapis idzie
+    przez memoryview bez pośredniej kopii. Większe lądują w pliku tymczasowym
+    na dysku - wtedy os.sendfile kopiuje bajty w jądrze, bez przechodzenia
+    przez bufory Pythona jak w pętli file.save.
+
+    Args:
+        file: Obiekt FileStorage z żądania
+        filepath: Docelowa ścieżka zapisu
+    """
+    stream = file.stream
+
+    if hasattr(stream, 'getbuffer'):
+        with open(filepath, 'wb') as dst:
+            dst.write(stream.getbuffer())
+        return
+
+    dst_fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        try:
+            src_fd = stream.fileno()
+            size = os.fstat(src_fd).st_size
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(dst_fd, src_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError:
+            # sendfile niedostępny na tej platformie - zwykła kopia strumienia
+            os.lseek(dst_fd, 0, os.SEEK_SET)
+            os.ftruncate(dst_fd, 0)
+            stream.seek(0)
+            with os.fdopen(dst_fd, 'wb') as dst:
+                dst_fd = -1
+                shutil.copyfileobj(stream, dst)
+    finally:
+        if dst_fd >= 0:
+            os.close(dst_fd)
+
+
 def allowed_file(filename):
     """
     Sprawdza, czy plik ma dozwolone rozszerzenie.
@@ -275,8 +478,9 @@ def allowed_file(filename):
     Returns:
         bool: True jeśli plik jest dozwolony
     """
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    # rpartition zwraca krotkę bez alokowania listy jak rsplit
+    _, dot, extension = filename.rpartition('.')
+    return bool(dot) and extension.lower() in _ALLOWED_EXTENSIONS
 
 
 def format_time(seconds):
@@ -289,12 +493,46 @@ def format_time(seconds):
     Returns:
         str: Sformatowany czas
     """
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
-    secs = seconds % 60
+    # divmod liczy iloraz i resztę w jednej operacji, zamiast
+    # trzech osobnych dzieleń
+    minutes, secs = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
     return f"{hours:02d}:{minutes:02d}:{secs:02d}"
 
 
+
+# Tabela tras aplikacji - rejestracja w jednej pętli przez add_url_rule
+# zamiast kilkunastu dekoratorów, dzięki czemu mapa routingu Werkzeuga
+# budowana jest w jednym przebiegu. strict_slashes=False wyłącza
+# generowanie wariantów reguł z końcowym ukośnikiem
+app.url_map.strict_slashes = False
+
+ROUTES = [
+    ('/', ['GET'], index),
+    ('/api/work-time', ['GET'], get_work_time),
+    ('/api/start-work', ['POST'], start_work),
+    ('/api/stop-work', ['POST'], stop_work),
+    ('/api/break-taken', ['POST'], break_taken),
+    ('/api/exercises', ['GET'], get_exercises),
+    ('/api/exercise/<int:exercise_id>', ['GET'], get_exercise),
+    ('/api/posture/upload', ['POST'], upload_posture_image),
+    ('/api/posture/result/<job_id>', ['GET'], get_posture_result),
+    ('/uploads/<name>', ['GET'], uploaded_image),
+    ('/api/posture/suggestions', ['GET'], get_posture_suggestions),
+    ('/api/stats', ['GET'], get_stats),
+    ('/api/state', ['GET'], get_state),
+    ('/api/timer', ['GET'], get_timer),
+    ('/api/timer/pomodoro', ['POST'], start_pomodoro),
+    ('/api/timer/break', ['POST'], start_break),
+    ('/api/timer/pause', ['POST'], pause_timer),
+    ('/api/timer/resume', ['POST'], resume_timer),
+    ('/api/timer/stop', ['POST'], stop_timer)
+]
+
+for _rule, _methods, _view in ROUTES:
+    app.add_url_rule(_rule, _view.__name__, _view, methods=_methods)
+
+
 if __name__ == '__main__':
     # Uruchomienie aplikacji w trybie debug (tylko do rozwoju)
     # Port 5001 zamiast 5000, ponieważ port 5000 jest często zajęty przez AirPlay na macOS
@@ -1,7 +1,26 @@
 #!/bin/bash
-# Skrypt do uruchomienia aplikacji
+# Skrypt do uruchomienia aplikacji przez gunicorn.
+# Dzięki wątkom niezależne żądania (odpytywanie timera, pobieranie ćwiczeń,
+# przesyłanie zdjęć) obsługiwane są równolegle.
+# Do rozwoju nadal można użyć: python app.py
 
 cd "$(dirname "$0")"
 source venv/bin/activate
-python app.py
 
+# Klasa workera: sync (domyślna) lub gevent.
+# Worker gevent pozwala, by blokujący zapis pliku w /api/posture/upload
+# nie wstrzymywał krótkich żądań odpytujących (/api/work-time, /api/timer),
+# które frontend wysyła co sekundę. Gunicorn sam wykonuje monkey-patching
+# przy starcie workera gevent.
+WORKER_CLASS=${GUNICORN_WORKER:-sync}
+
+# Uwaga: jeden proces roboczy. Stan timera i sesji (WorkMonitor) żyje
+# w pamięci procesu, więc przy wielu workerach kolejne żądania trafiałyby
+# do procesów z rozjechanym stanem. Równoległość w obrębie jednego procesu
+# zapewniają wątki (sync) lub greenlety (gevent). Więcej workerów dopiero
+# po przeniesieniu stanu poza proces.
+if [ "$WORKER_CLASS" = "gevent" ]; then
+    exec gunicorn -k gevent --worker-connections 1000 -w 1 -b 127.0.0.1:5001 app:app
+else
+    exec gunicorn -w 1 -k sync --threads 4 -b 127.0.0.1:5001 app:app
+fi
@@ -400,13 +400,32 @@ async function analyzePosture() {
 
     const data = await response.json();
 
+    if (!response.ok || !data.job_id) {
+      analyzeBtn.disabled = false;
+      analyzeBtn.textContent = "Przeanalizuj Postawę";
+      alert(data.error || data.message || "Błąd podczas analizy");
+      return;
+    }
+
+    // Analiza wykonywana jest w tle - odpytujemy o wynik co pół sekundy
+    let result = { status: "pending" };
+    for (let attempt = 0; attempt < 120 && result.status === "pending"; attempt++) {
+      const res = await fetch(`/api/posture/result/${data.job_id}`);
+      result = await res.json();
+      if (result.status === "pending") {
+        await new Promise((resolve) => setTimeout(resolve, 500));
+      }
+    }
+
     analyzeBtn.disabled = false;
     analyzeBtn.textContent = "Przeanalizuj Postawę";
 
-    if (data.status === "success") {
-      displayAnalysisResults(data.analysis);
+    if (result.status === "done" && result.analysis.status === "success") {
+      displayAnalysisResults(result.analysis);
     } else {
-      alert(data.message || "Błąd podczas analizy");
+      alert(
+        (result.analysis && result.analysis.message) || "Błąd podczas analizy"
+      );
     }
   } catch (error) {
     console.error("Błąd podczas analizy postawy:", error);
@@ -5,6 +5,10 @@ Moduł śledzi czas spędzony przy komputerze, sugeruje przerwy
 i przechowuje statystyki pracy.
 """
 
+import atexit
+import queue
+import struct
+import threading
 import time
 from datetime import datetime, timedelta
 import psutil
@@ -12,6 +16,100 @@ import json
 import os
 
 
+# Binarny format pliku statystyk: bajt wersji, czas pracy (double),
+# znacznik czasu zapisu w sekundach epoki (uint64) - 17 bajtów zamiast
+# dokumentu JSON, odczyt i zapis to pojedynczy (un)pack bez parsowania tekstu
+_STATS_STRUCT = struct.Struct('<BdQ')
+_STATS_VERSION = 1
+
+# Próg bezczynności użytkownika: brak wejścia (klawiatura/mysz) przez minutę
+# oznacza, że komputer nie jest aktywnie używany
+_IDLE_THRESHOLD_MS = 60_000
+
+# Nanosekundy w sekundzie - arytmetyka timera prowadzona jest na liczbach
+# całkowitych z time.monotonic_ns()
+_NS_PER_S = 1_000_000_000
+
+
+def _make_idle_reader():
+    """
+    Buduje funkcję odczytującą czas bezczynności użytkownika z API systemu.
+
+    Systemowy licznik ostatniego wejścia (GetLastInputInfo w Windows,
+    XScreenSaverQueryInfo pod X11) mówi wprost, od ilu milisekund użytkownik
+    nie dotknął klawiatury ani myszy - bez próbkowania i bez mylenia
+    obciążenia CPU przez procesy w tle z obecnością człowieka.
+
+    Returns:
+        callable: Funkcja zwracająca bezczynność w milisekundach,
+                  lub None, gdy żadne systemowe API nie jest dostępne
+    """
+    try:
+        import ctypes
+
+        if os.name == 'nt':
+            # Windows: GetLastInputInfo + GetTickCount
+            class _LASTINPUTINFO(ctypes.Structure):
+                _fields_ = [('cbSize', ctypes.c_uint),
+                            ('dwTime', ctypes.c_uint)]
+
+            user32 = ctypes.windll.user32
+            kernel32 = ctypes.windll.kernel32
+
+            def reader():
+                info = _LASTINPUTINFO()
+                info.cbSize = ctypes.sizeof(_LASTINPUTINFO)
+                if not user32.GetLastInputInfo(ctypes.byref(info)):
+                    raise OSError('GetLastInputInfo nie powiodło się')
+                return (kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF
+
+            reader()  # Próbny odczyt - walidacja przy starcie
+            return reader
+
+        # Linux/X11: rozszerzenie XScreenSaver
+        class _XScreenSaverInfo(ctypes.Structure):
+            _fields_ = [('window', ctypes.c_ulong),
+                        ('state', ctypes.c_int),
+                        ('kind', ctypes.c_int),
+                        ('since', ctypes.c_ulong),
+                        ('idle', ctypes.c_ulong),
+                        ('eventMask', ctypes.c_ulong)]
+
+        xlib = ctypes.CDLL('libX11.so.6')
+        xss = ctypes.CDLL('libXss.so.1')
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        xss.XScreenSaverAllocInfo.restype = ctypes.POINTER(_XScreenSaverInfo)
+        xss.XScreenSaverQueryInfo.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XScreenSaverInfo)
+        ]
+
+        display = xlib.XOpenDisplay(None)
+        if not display:
+            return None
+        root = xlib.XDefaultRootWindow(display)
+        info = xss.XScreenSaverAllocInfo()
+
+        def reader():
+            if not xss.XScreenSaverQueryInfo(display, root, info):
+                raise OSError('XScreenSaverQueryInfo nie powiodło się')
+            return int(info.contents.idle)
+
+        reader()  # Próbny odczyt - walidacja przy starcie
+        return reader
+    except Exception:
+        # Brak biblioteki, wyświetlacza lub API - zostaje heurystyka CPU
+        return None
+
+
+# Tablica gotowych napisów "MM:SS" dla wszystkich wartości poniżej godziny -
+# timer Pomodoro (25 min) i przerwy (5 min) zawsze mieszczą się w tym zakresie,
+# więc formatowanie sprowadza się do indeksowania krotki (~28 KB pamięci)
+_MMSS = tuple(f"{i // 60:02d}:{i % 60:02d}" for i in range(3600))
+
+
 class WorkMonitor:
     """
     Klasa odpowiedzialna za monitorowanie czasu pracy przy komputerze.
@@ -34,31 +132,95 @@ class WorkMonitor:
         self.is_working = False
         self.total_work_time_today = 0
         self.last_break_time = None
-        self.stats_file = 'work_stats.json'
+        # Moment, od którego należy sugerować przerwę - wyliczany przy
+        # starcie sesji i rejestracji przerwy, aby odpytywanie sprowadzało
+        # się do jednego porównania
+        self._next_break_at = 0.0
+        self.stats_file = 'work_stats.dat'
+        # Starszy plik JSON - importowany jednorazowo, gdy binarnego
+        # jeszcze nie ma
+        self._legacy_stats_file = 'work_stats.json'
         
         # Pomodoro timer
         self.pomodoro_time = 25 * 60  # 25 minut w sekundach
         self.break_time = 5 * 60  # 5 minut w sekundach
-        self.timer_start_time = None
-        self.timer_duration = 0  # Czas trwania timera w sekundach
-        self.timer_running = False
-        self.timer_paused = False
-        self.timer_paused_at = 0  # Czas, w którym timer został zatrzymany
-        self.timer_elapsed = 0  # Czas, który już upłynął przed pauzą
+        # Stan timera spakowany w jedną krotkę
+        # (running, paused, duration_ns, elapsed_ns, start_ns) - gorąca
+        # ścieżka get_timer_remaining rozpakowuje ją raz do zmiennych
+        # lokalnych, zamiast wykonywać pięć osobnych odczytów atrybutów.
+        # Czasy trzymane są w całkowitych nanosekundach (monotonic_ns),
+        # więc cała arytmetyka odliczania jest całkowitoliczbowa
+        self._timer = (False, False, 0, 0, 0)
         self.timer_type = None  # 'pomodoro' lub 'break'
-        
-        # Załadowanie statystyk z poprzednich sesji
-        self.load_stats()
+        self._timer_deadline_ns = 0  # Moment, w którym timer się skończy
+
+        # Cache zserializowanej odpowiedzi /api/timer - unieważniany przy
+        # zmianie stanu timera i przy każdej zmianie pozostałego czasu
+        self._timer_cache_bytes = None
+        self._timer_cache_remaining = None
+
+        # Pomiar CPU w tle: osobny wątek-próbnik aktualizuje ostatni odczyt
+        # co 2 sekundy, a is_computer_active tylko czyta gotową wartość.
+        # Wątek startuje leniwie przy pierwszym użyciu (i ponownie po forku
+        # procesu roboczego, gdy odziedziczony wątek już nie żyje)
+        self._cpu_val = 0.0
+        self._cpu_thread = None
+
+        # Preferowany pomiar aktywności: systemowy licznik bezczynności
+        # (mikrosekundy na wywołanie, poprawna semantyka "użytkownik przy
+        # klawiaturze"); None oznacza powrót do heurystyki CPU
+        self._idle_reader = _make_idle_reader()
+
+        # Ostatnio zapisany (zaokrąglony do sekundy) czas pracy - zapis
+        # na dysk wykonywany jest tylko, gdy wartość faktycznie się zmieniła
+        self._last_saved_work_time = None
+
+        # Throttling zapisów: częste start/stop sesji (np. wykrywanie AFK)
+        # oznaczają tylko zaległy zapis, a na dysk trafia on najwyżej raz
+        # na 30 sekund; zaległości dopisywane są przy wyjściu z procesu
+        self._pending_save = False
+        self._last_save_ts = 0.0
+        atexit.register(self._flush_stats)
+
+        # Dzisiejsza data jako gotowy napis oraz moment najbliższej północy -
+        # statystyki dzienne odpytywane są często, a alokowanie obiektu
+        # datetime i strftime przy każdym wywołaniu jest zbędne, dopóki
+        # nie zmieni się dzień
+        self._today_str = None
+        self._next_midnight = 0.0
+        self._refresh_day()
+
+        # Komunikaty logowane są przez kolejkę opróżnianą przez wątek w tle -
+        # print na gorącej ścieżce sesji nie czeka na opróżnienie stdout
+        # (wątek startuje leniwie, jak wątek-próbnik CPU)
+        self._log_q = queue.Queue()
+        self._log_thread = None
+
+        # Cache ostatniej odpowiedzi get_daily_stats (znacznik czasu, słownik) -
+        # interfejs odpytujący kilka razy na sekundę dostaje gotowy wynik,
+        # unieważniany przy zmianach stanu sesji
+        self._tick_cache = (0.0, None)
+
+        # Cache sformatowanych napisów HH:MM:SS - odpytujący interfejs
+        # formatuje tę samą wartość wielokrotnie w obrębie sekundy
+        self._fmt_cache = {}
+
+        # Statystyki z poprzednich sesji ładowane są leniwie, przy pierwszym
+        # odczycie czasu pracy - konstruktor nie płaci za otwarcie i parsowanie
+        # pliku, jeśli nikt ze statystyk nie korzysta
+        self._stats_loaded = False
     
     def start_session(self):
         """
         Rozpoczęcie sesji pracy.
         Zapisuje czas rozpoczęcia i oznacza sesję jako aktywną.
         """
-        self.session_start_time = time.time()
+        self.session_start_time = time.monotonic()
         self.is_working = True
         self.last_break_time = None
-        print(f"Sesja pracy rozpoczęta o {datetime.now().strftime('%H:%M:%S')}")
+        self._next_break_at = self.session_start_time + self.break_interval
+        self._tick_cache = (0.0, None)
+        self._log(f"Sesja pracy rozpoczęta o {time.strftime('%H:%M:%S')}")
     
     def stop_session(self):
         """
@@ -66,70 +228,136 @@ class WorkMonitor:
         Zapisuje czas pracy i aktualizuje statystyki.
         """
         if self.is_working and self.session_start_time:
-            session_duration = time.time() - self.session_start_time
+            self._ensure_stats_loaded()
+            session_duration = time.monotonic() - self.session_start_time
             self.total_work_time_today += session_duration
             self.save_stats()
-            print(f"Sesja pracy zakończona. Czas pracy: {self.format_time(session_duration)}")
+            self._log(f"Sesja pracy zakończona. Czas pracy: {self.format_time(session_duration)}")
         
         self.is_working = False
         self.session_start_time = None
-    
-    def get_current_work_time(self):
+        self._tick_cache = (0.0, None)
+
+    def get_current_work_time(self, now=None):
         """
         Pobiera aktualny czas pracy w bieżącej sesji.
         
+        Args:
+            now: Opcjonalny, wspólny znacznik czasu (time.monotonic()), aby kilka
+                 odczytów stanu w jednym żądaniu było spójnych
+        
         Returns:
             int: Czas pracy w sekundach
         """
         if not self.is_working or not self.session_start_time:
             return 0
-        
-        current_session_time = time.time() - self.session_start_time
+
+        self._ensure_stats_loaded()
+        if now is None:
+            now = time.monotonic()
+        current_session_time = now - self.session_start_time
         return int(current_session_time + self.total_work_time_today)
     
-    def should_take_break(self):
+    def should_take_break(self, now=None):
         """
         Sprawdza, czy powinna być sugerowana przerwa.
         
+        Args:
+            now: Opcjonalny, wspólny znacznik czasu (time.monotonic())
+        
         Returns:
             bool: True jeśli czas na przerwę
         """
         if not self.is_working or not self.session_start_time:
             return False
-        
-        current_session_time = time.time() - self.session_start_time
-        
-        # Sprawdź, czy minął interwał od ostatniej przerwy lub rozpoczęcia sesji
-        if self.last_break_time:
-            time_since_break = time.time() - self.last_break_time
-            return time_since_break >= self.break_interval
-        else:
-            return current_session_time >= self.break_interval
+
+        if now is None:
+            now = time.monotonic()
+        # Termin następnej przerwy wyliczany jest przy starcie sesji
+        # i rejestracji przerwy, więc tu zostaje jedno porównanie
+        return now >= self._next_break_at
     
     def record_break(self):
         """
         Rejestruje wykonanie przerwy.
         Resetuje timer do następnej sugestii przerwy.
         """
-        self.last_break_time = time.time()
-        print(f"Przerwa zarejestrowana o {datetime.now().strftime('%H:%M:%S')}")
+        self.last_break_time = time.monotonic()
+        self._next_break_at = self.last_break_time + self.break_interval
+        self._tick_cache = (0.0, None)
+        self._log(f"Przerwa zarejestrowana o {time.strftime('%H:%M:%S')}")
     
-    def get_daily_stats(self):
+    def _log(self, message):
+        """
+        Odkłada komunikat do kolejki logów zamiast pisać na stdout wprost.
+
+        Zapis na konsolę (zwłaszcza przekierowaną do potoku) potrafi
+        blokować - wykonuje go wątek w tle, a wywołujący tylko dokłada
+        wpis do kolejki.
+        """
+        if self._log_thread is None or not self._log_thread.is_alive():
+            self._log_thread = threading.Thread(
+                target=self._log_writer, daemon=True
+            )
+            self._log_thread.start()
+        self._log_q.put(message)
+
+    def _log_writer(self):
+        """
+        Pętla wątku logującego: drukuje komunikaty z kolejki.
+        """
+        while True:
+            print(self._log_q.get())
+
+    def get_daily_stats(self, now=None):
         """
         Pobiera statystyki dzienne pracy.
         
+        Args:
+            now: Opcjonalny, wspólny znacznik czasu (time.monotonic())
+        
         Returns:
             dict: Słownik ze statystykami (czas pracy, liczba przerw, itp.)
         """
-        current_time = self.get_current_work_time()
-        
-        return {
+        if now is None:
+            now = time.monotonic()
+
+        # Wynik z ostatniego pół sekundy jest nadal aktualny (czas pracy
+        # ma rozdzielczość sekundy), więc częste odpytywanie trafia w cache
+        cached_ts, cached = self._tick_cache
+        if cached is not None and now - cached_ts < 0.5:
+            return cached
+
+        # Napis z datą odświeżany jest dopiero po przekroczeniu północy;
+        # sprawdzane na zegarze ściennym, bo monotoniczny stoi w uśpieniu
+        if time.time() >= self._next_midnight:
+            self._refresh_day()
+
+        current_time = self.get_current_work_time(now)
+
+        stats = {
             'total_work_time_seconds': current_time,
             'total_work_time_formatted': self.format_time(current_time),
             'is_working': self.is_working,
-            'break_suggested': self.should_take_break(),
-            'date': datetime.now().strftime('%Y-%m-%d')
+            'break_suggested': self.should_take_break(now),
+            'date': self._today_str
         }
+        self._tick_cache = (now, stats)
+        return stats
+
+    def _refresh_day(self):
+        """
+        Odświeża zapamiętaną datę dzienną i moment najbliższej północy.
+
+        Próg północy wyrażony jest jako epoka zegara ściennego (time.time()) -
+        zegar monotoniczny nie płynie podczas uśpienia komputera, więc próg
+        na nim oparty nigdy nie zostałby przekroczony po nocy w uśpieniu.
+        """
+        now_dt = datetime.now()
+        self._today_str = now_dt.strftime('%Y-%m-%d')
+        midnight = datetime(now_dt.year, now_dt.month, now_dt.day)
+        self._midnight_epoch = midnight.timestamp()
+        self._next_midnight = (midnight + timedelta(days=1)).timestamp()
     
     def format_time(self, seconds):
         """
@@ -141,45 +369,150 @@ class WorkMonitor:
         Returns:
             str: Sformatowany czas (HH:MM:SS)
         """
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+        seconds = int(seconds)
+        cached = self._fmt_cache.get(seconds)
+        if cached is not None:
+            return cached
+
+        # divmod liczy iloraz i resztę w jednej operacji, zamiast osobnych
+        # dzieleń i modulo dla każdej składowej
+        minutes, secs = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        formatted = f"{hours:02d}:{minutes:02d}:{secs:02d}"
+
+        # Prosta ewikcja: po przekroczeniu limitu wypada najstarszy wpis
+        # (słowniki zachowują kolejność wstawiania)
+        if len(self._fmt_cache) >= 256:
+            self._fmt_cache.pop(next(iter(self._fmt_cache)))
+        self._fmt_cache[seconds] = formatted
+        return formatted
     
     def save_stats(self):
         """
-        Zapisuje statystyki do pliku JSON.
+        Zapisuje statystyki do pliku JSON (z throttlingiem).
+
+        Zmiana jest tylko odnotowywana, a faktyczny zapis na dysk
+        wykonywany jest najwyżej raz na 30 sekund - wiele szybkich
+        aktualizacji (częste start/stop sesji) składa się w jeden zapis.
+        Zaległy zapis trafia na dysk najpóźniej przy wyjściu z procesu.
+        """
+        self._pending_save = True
+        if time.monotonic() - self._last_save_ts >= 30:
+            self._flush_stats()
+
+    def _flush_stats(self):
         """
-        stats = {
-            'total_work_time_today': self.total_work_time_today,
-            'last_updated': datetime.now().isoformat()
-        }
-        
+        Wykonuje zaległy zapis statystyk na dysk, jeśli jakiś czeka.
+        """
+        if not self._pending_save:
+            return
+        self._pending_save = False
+        self._last_save_ts = time.monotonic()
+
+        # Pomijamy zapis, gdy czas pracy nie zmienił się o co najmniej
+        # sekundę od ostatniego zapisu - bez zmiany nie ma sensu płacić
+        # za serializację i operacje dyskowe
+        rounded = int(self.total_work_time_today)
+        if rounded == self._last_saved_work_time:
+            return
+
+        # Rekord binarny o stałym rozmiarze zamiast dokumentu JSON -
+        # jeden struct.pack, zero kodowania tekstu. Zapis idzie do
+        # pliku tymczasowego i podmieniany jest atomowo przez os.replace -
+        # czytelnik nigdy nie zobaczy pliku zapisanego częściowo
+        payload = _STATS_STRUCT.pack(
+            _STATS_VERSION, self.total_work_time_today, int(time.time())
+        )
+
+        tmp_file = self.stats_file + '.tmp'
         try:
-            with open(self.stats_file, 'w') as f:
-                json.dump(stats, f, indent=2)
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.write(fd, payload)
+            finally:
+                os.close(fd)
+            os.replace(tmp_file, self.stats_file)
+            self._last_saved_work_time = rounded
         except Exception as e:
             print(f"Błąd podczas zapisywania statystyk: {e}")
     
+    def _ensure_stats_loaded(self):
+        """
+        Ładuje statystyki z dysku przy pierwszym użyciu (leniwie).
+        Kolejne wywołania korzystają z wartości trzymanej w pamięci.
+        """
+        if not self._stats_loaded:
+            self.load_stats()
+
     def load_stats(self):
         """
-        Ładuje statystyki z pliku JSON.
+        Ładuje statystyki z binarnego pliku stanu.
+
+        Gdy binarnego pliku jeszcze nie ma, importowany jest starszy
+        format JSON (work_stats.json).
         """
-        if os.path.exists(self.stats_file):
-            try:
-                with open(self.stats_file, 'r') as f:
-                    stats = json.load(f)
-                    # Sprawdź, czy statystyki są z dzisiaj
-                    last_updated = datetime.fromisoformat(stats.get('last_updated', '2000-01-01'))
-                    if last_updated.date() == datetime.now().date():
-                        self.total_work_time_today = stats.get('total_work_time_today', 0)
-                    else:
-                        # Nowy dzień - reset statystyk
-                        self.total_work_time_today = 0
-            except Exception as e:
-                print(f"Błąd podczas ładowania statystyk: {e}")
+        self._stats_loaded = True
+        try:
+            # Otwarcie od razu, bez wcześniejszego os.path.exists - jeden
+            # syscall zamiast dwóch, a brak pliku obsługuje wyjątek
+            # (przy okazji znika okno wyścigu między sprawdzeniem a odczytem)
+            with open(self.stats_file, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            self._import_legacy_stats()
+            return
+        except Exception as e:
+            print(f"Błąd podczas ładowania statystyk: {e}")
+            self.total_work_time_today = 0
+            return
+
+        try:
+            version, total, saved_epoch = _STATS_STRUCT.unpack(data)
+            if version != _STATS_VERSION:
+                raise ValueError(f"nieznana wersja formatu statystyk: {version}")
+
+            # Sprawdź, czy statystyki są z dzisiaj - wystarczy porównać
+            # znacznik zapisu z epoką dzisiejszej północy, bez żadnego
+            # parsowania dat
+            if time.time() >= self._next_midnight:
+                self._refresh_day()
+            if saved_epoch >= self._midnight_epoch:
+                self.total_work_time_today = total
+            else:
+                # Nowy dzień - reset statystyk
                 self.total_work_time_today = 0
-        else:
+        except Exception as e:
+            print(f"Błąd podczas ładowania statystyk: {e}")
+            self.total_work_time_today = 0
+
+    def _import_legacy_stats(self):
+        """
+        Jednorazowy import statystyk ze starszego formatu JSON.
+        """
+        try:
+            with open(self._legacy_stats_file, 'rb') as f:
+                stats = json.loads(f.read())
+        except FileNotFoundError:
+            self.total_work_time_today = 0
+            return
+        except Exception as e:
+            print(f"Błąd podczas ładowania statystyk: {e}")
+            self.total_work_time_today = 0
+            return
+
+        try:
+            # Znacznik ISO zaczyna się od "YYYY-MM-DD" - porównanie
+            # pierwszych 10 znaków z dzisiejszą datą
+            if time.time() >= self._next_midnight:
+                self._refresh_day()
+            last_date = stats.get('last_updated', '2000-01-01')[:10]
+            if last_date == self._today_str:
+                self.total_work_time_today = stats.get('total_work_time_today', 0)
+            else:
+                # Nowy dzień - reset statystyk
+                self.total_work_time_today = 0
+        except Exception as e:
+            print(f"Błąd podczas ładowania statystyk: {e}")
             self.total_work_time_today = 0
     
     def is_computer_active(self):
@@ -190,79 +523,132 @@ class WorkMonitor:
         Returns:
             bool: True jeśli komputer wydaje się aktywny
         """
-        # Prosty heurystyka: jeśli CPU jest używany powyżej 5%, uznajemy za aktywność
-        cpu_percent = psutil.cpu_percent(interval=0.1)
-        return cpu_percent > 5.0
+        # Najpierw systemowe API bezczynności: mówi wprost, kiedy użytkownik
+        # ostatnio użył klawiatury lub myszy - w przeciwieństwie do heurystyki
+        # CPU nie myli zadań w tle z obecnością człowieka
+        if self._idle_reader is not None:
+            try:
+                return self._idle_reader() < _IDLE_THRESHOLD_MS
+            except Exception:
+                # API przestało działać (np. zamknięta sesja X) -
+                # dalej już tylko heurystyka CPU
+                self._idle_reader = None
+
+        # Zapasowa heurystyka: jeśli CPU jest używany powyżej 5%, uznajemy za
+        # aktywność. Pomiar wykonuje wątek-próbnik w tle, więc wywołujący
+        # nigdy nie czeka w psutil - czyta tylko ostatnią wartość
+        if self._cpu_thread is None or not self._cpu_thread.is_alive():
+            self._cpu_thread = threading.Thread(
+                target=self._cpu_sampler, daemon=True
+            )
+            self._cpu_thread.start()
+        return self._cpu_val > 5.0
+
+    def _cpu_sampler(self):
+        """
+        Pętla wątku-próbnika: odświeża ostatni pomiar zużycia CPU co 2 sekundy.
+        Blokujący interwał psutil wyznacza jednocześnie kadencję próbkowania.
+        """
+        while True:
+            self._cpu_val = psutil.cpu_percent(interval=2.0)
     
+    @property
+    def timer_running(self):
+        """bool: Czy timer jest uruchomiony."""
+        return self._timer[0]
+
+    @property
+    def timer_paused(self):
+        """bool: Czy timer jest zapauzowany."""
+        return self._timer[1]
+
+    def _set_timer(self, running, paused, duration_ns, elapsed_ns, start_ns):
+        """
+        Ustawia spakowany stan timera i unieważnia cache odpowiedzi.
+        """
+        self._timer = (running, paused, duration_ns, elapsed_ns, start_ns)
+        self._timer_cache_bytes = None
+
     def start_pomodoro(self):
         """
         Rozpoczyna timer Pomodoro (25 minut).
         """
-        self.timer_duration = self.pomodoro_time
-        self.timer_start_time = time.time()
-        self.timer_running = True
-        self.timer_paused = False
-        self.timer_elapsed = 0
-        self.timer_paused_at = 0
+        start_ns = time.monotonic_ns()
+        duration_ns = self.pomodoro_time * _NS_PER_S
+        self._timer_deadline_ns = start_ns + duration_ns
         self.timer_type = 'pomodoro'
-    
+        self._set_timer(True, False, duration_ns, 0, start_ns)
+
     def start_break(self):
         """
         Rozpoczyna timer przerwy (5 minut).
         """
-        self.timer_duration = self.break_time
-        self.timer_start_time = time.time()
-        self.timer_running = True
-        self.timer_paused = False
-        self.timer_elapsed = 0
-        self.timer_paused_at = 0
+        start_ns = time.monotonic_ns()
+        duration_ns = self.break_time * _NS_PER_S
+        self._timer_deadline_ns = start_ns + duration_ns
         self.timer_type = 'break'
-    
+        self._set_timer(True, False, duration_ns, 0, start_ns)
+
     def pause_timer(self):
         """
         Pauzuje timer.
         """
-        if self.timer_running and not self.timer_paused:
-            self.timer_paused_at = time.time()
-            self.timer_elapsed += self.timer_paused_at - self.timer_start_time
-            self.timer_paused = True
-    
+        running, paused, duration_ns, elapsed_ns, start_ns = self._timer
+        if running and not paused:
+            elapsed_ns += time.monotonic_ns() - start_ns
+            self._set_timer(True, True, duration_ns, elapsed_ns, start_ns)
+
     def resume_timer(self):
         """
         Wznawia timer.
         """
-        if self.timer_paused:
-            self.timer_start_time = time.time()
-            self.timer_paused = False
-    
+        running, paused, duration_ns, elapsed_ns, _ = self._timer
+        if paused:
+            start_ns = time.monotonic_ns()
+            self._timer_deadline_ns = start_ns + (duration_ns - elapsed_ns)
+            self._set_timer(True, False, duration_ns, elapsed_ns, start_ns)
+
     def stop_timer(self):
         """
         Zatrzymuje timer.
         """
-        self.timer_running = False
-        self.timer_paused = False
-        self.timer_start_time = None
-        self.timer_elapsed = 0
-        self.timer_paused_at = 0
         self.timer_type = None
-    
-    def get_timer_remaining(self):
+        self._timer_deadline_ns = 0
+        self._set_timer(False, False, 0, 0, 0)
+
+    def get_timer_remaining(self, now=None):
         """
         Pobiera pozostały czas timera w sekundach.
-        
+
+        Args:
+            now: Opcjonalny, wspólny znacznik czasu (time.monotonic())
+
         Returns:
             int: Pozostały czas w sekundach (0 jeśli timer się skończył)
         """
-        if not self.timer_running:
+        # Jedno rozpakowanie krotki zamiast serii odczytów atrybutów;
+        # odliczanie w całkowitych nanosekundach - bez błędów zaokrągleń
+        # zmiennoprzecinkowych tuż przed końcem timera
+        running, paused, duration_ns, elapsed_ns, _ = self._timer
+        if not running:
             return 0
-        
-        if self.timer_paused:
-            remaining = self.timer_duration - self.timer_elapsed
+
+        if paused:
+            remaining_ns = duration_ns - elapsed_ns
         else:
-            elapsed = self.timer_elapsed + (time.time() - self.timer_start_time)
-            remaining = self.timer_duration - elapsed
-        
-        return max(0, int(remaining))
+            # Termin końca wyliczany jest przy starcie/wznowieniu timera,
+            # więc na gorącej ścieżce zostaje jedno odejmowanie
+            if now is None:
+                now_ns = time.monotonic_ns()
+            else:
+                # Wspólny znacznik z time.monotonic() - ten sam zegar,
+                # tylko w sekundach
+                now_ns = int(now * _NS_PER_S)
+            remaining_ns = self._timer_deadline_ns - now_ns
+
+        if remaining_ns <= 0:
+            return 0
+        return remaining_ns // _NS_PER_S
     
     def format_timer_time(self, seconds):
         """
@@ -274,7 +660,35 @@ class WorkMonitor:
         Returns:
             str: Sformatowany czas (MM:SS)
         """
-        minutes = int(seconds // 60)
-        secs = int(seconds % 60)
+        seconds = int(seconds)
+        if 0 <= seconds < 3600:
+            return _MMSS[seconds]
+        minutes, secs = divmod(seconds, 60)
         return f"{minutes:02d}:{secs:02d}"
 
+    def snapshot_timer(self, now=None):
+        """
+        Zwraca stan timera jako gotową, zserializowaną odpowiedź JSON.
+
+        Odpowiedź budowana jest tylko wtedy, gdy zmienił się stan timera
+        lub pozostały czas - kolejne odpytania w tej samej sekundzie
+        (np. od wielu otwartych kart) dostają te same bajty z cache.
+
+        Returns:
+            bytes: Odpowiedź JSON dla /api/timer
+        """
+        remaining = self.get_timer_remaining(now)
+
+        if self._timer_cache_bytes is None or remaining != self._timer_cache_remaining:
+            payload = {
+                'remaining_seconds': remaining,
+                'remaining_formatted': self.format_timer_time(remaining),
+                'running': self.timer_running,
+                'paused': self.timer_paused,
+                'timer_type': self.timer_type  # 'pomodoro' lub 'break'
+            }
+            self._timer_cache_bytes = json.dumps(payload).encode('utf-8')
+            self._timer_cache_remaining = remaining
+
+        return self._timer_cache_bytes
+